@@ -22,9 +22,12 @@ from ashraesizer import ASHRAEsizer
 from cfg import rhoCp, W_TO_BTUHR, HRLIST_to_MINLIST, tmCompMinimumRunTime
 from dataFetch import hpwhDataFetch
 from Simulator import Simulator
+from resultCache import ResultCache
 
 
 import os
+import json
+import hashlib
 import numpy as np
 from plotly.graph_objs import Figure, Scatter
 from plotly.offline import plot
@@ -200,6 +203,11 @@ class HPWHsizer:
         Writes the results of sizing the primary and temperature maintenance
         systems to a file.
 
+    setResultCache(fileName=None, maxSize_MB=50.)
+        Stores the sizing results, sizing curve, and simulation results in a
+        local SQLite cache keyed by the inputs so repeated runs return without
+        recomputation.
+
     Examples
     --------
     **Example 1: Find the recommended size for a parallel loop tank schematic.**
@@ -377,11 +385,26 @@ class HPWHsizer:
     parallel loop systems as well. Those systems must be initialized properly
     as shown in previous examples.
 
+    **Example 5: Cache results between runs.**
+
+    Sizing results, the primary sizing curve and the simulation results can be
+    stored in a local SQLite file keyed by a hash of the inputs. Any sizer,
+    in this or any later process, initialized with the same inputs then reads
+    the results back rather than recomputing them:
+
+    >>> hpwh.setResultCache("hpwhcache.sqlite", maxSize_MB = 50)
+    >>> hpwh.build_size()
+    [843.657112791371, 94.1487558229551, '80', 21.4964946]
+
     """
     with open(os.path.join(os.path.dirname(__file__), '_version.py')) as version_file:
         __versionfull__ = version_file.readlines()[-1].split()[-1].split("'")[1] #some hacking of the
         __version__ = __versionfull__.split('d')[0]
 
+    # Attributes set when sizing the components, these are stored in the result cache.
+    sizedPrimaryAtts = ["PVol_G_atStorageT", "PCap_kBTUhr", "effSwingFract", "LSconstrained"]
+    sizedTempMaintAtts = ["TMVol_G", "TMCap_kBTUhr"]
+
     def __init__(self):
 
         print("HPWHulator Copyright (C) 2020  Ecotope Inc. ")
@@ -398,6 +421,33 @@ class HPWHsizer:
 
         self.swingTankLoad_W = 0.
 
+        self.resultCache = None
+
+    def setResultCache(self, fileName=None, maxSize_MB=50.):
+        """
+        Sets up a persistent result cache for the sizer. Sizing results, the
+        primary sizing curve and simulation results are stored under a hash of
+        the inputs and are returned from the cache on repeated requests.
+
+        Attributes
+        ----------
+        fileName : str
+            The SQLite file for the cache. Defaults to
+            ~/.hpwhulator/resultcache.sqlite
+        maxSize_MB : float
+            The maximum size of the cache in megabytes, the least recently
+            used results are evicted past this size. Defaults to 50.
+        """
+        self.resultCache = ResultCache(fileName, maxSize_MB)
+
+    def __cacheKey(self, *args):
+        """
+        Returns the key for the result cache from the input hash, the load
+        shift flag and any additional arguments.
+        """
+        key = [self.inputs.getInputHash(), self.doLoadShift] + [canonicalValue(arg) for arg in args]
+        return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
     def initializeFromFile(self, fileName):
         """
         Initilizes a system from a file
@@ -667,7 +717,28 @@ class HPWHsizer:
             maintenance systems
         """
         self.buildSystem()
-        return self.sizeSystem()
+        if self.resultCache is None:
+            return self.sizeSystem()
+
+        key = self.__cacheKey()
+        cached = self.resultCache.get(key, "build_size")
+        if cached is None:
+            results = self.sizeSystem()
+            cached = {"results" : results,
+                      "primarySystem" : {att : getattr(self.primarySystem, att) for att in self.sizedPrimaryAtts}}
+            if self.tempmaintSystem:
+                cached["tempmaintSystem"] = {att : getattr(self.tempmaintSystem, att) for att in self.sizedTempMaintAtts}
+            self.resultCache.set(key, "build_size", cached)
+            return results
+
+        # Restore the sized system from the cache
+        for att, val in cached["primarySystem"].items():
+            setattr(self.primarySystem, att, val)
+        if self.tempmaintSystem:
+            for att, val in cached["tempmaintSystem"].items():
+                setattr(self.tempmaintSystem, att, val)
+        self.systemSized = True
+        return cached["results"]
 
     def getASHRAEResult(self):
         """
@@ -717,7 +788,7 @@ class HPWHsizer:
         #               hovertemplate = hovertext,
         #               name='ASHRAE Low Curve' ))
 
-        [x_data, y_data, _, recInd] = self.primarySystem.primaryCurve()
+        [x_data, y_data, _, recInd] = self.__primaryCurve()
         fig.add_trace(Scatter(x=x_data, y=y_data,
                               mode='lines', name='Primary Sizing Curve',
                               hovertemplate=hovertext,
@@ -902,11 +973,25 @@ class HPWHsizer:
             return plot_div
         return fig
 
+    def __primaryCurve(self):
+        """
+        Returns the primary sizing curve, from the result cache if set.
+        """
+        if self.resultCache is None:
+            return self.primarySystem.primaryCurve()
+
+        key = self.__cacheKey()
+        pCurve = self.resultCache.get(key, "primaryCurve")
+        if pCurve is None:
+            pCurve = self.primarySystem.primaryCurve()
+            self.resultCache.set(key, "primaryCurve", pCurve)
+        return pCurve
+
     def writeToFile(self, fileName):
         primaryWriter = writeClassAtts(self.primarySystem, fileName, 'w+')
         primaryWriter.writeLine('primarySystem:\n')
         primaryWriter.writeToFile()
-        pCurve = self.primarySystem.primaryCurve()
+        pCurve = self.__primaryCurve()
         primaryWriter.writeLine('primaryCurve_vol, ' +np.array2string(pCurve[0], precision = 2, separator=",", max_line_width = 300.))
         primaryWriter.writeLine('primaryCurve_heatCap_kBTUhr, ' +np.array2string(pCurve[1], precision = 2, separator=",", max_line_width = 300.))
         if self.tempmaintSystem is not None:
@@ -949,6 +1034,19 @@ class HPWHsizer:
             else:
                 raise Exception("The system hasn't been sized yet! Either specify capacity AND volume or size the system.")
 
+        if self.resultCache is not None:
+            key = self.__cacheKey(Pcapacity, Pvolume)
+            simResults = self.resultCache.get(key, "simulation")
+            if simResults is None:
+                simResults = self.__runStorage_Load_Sim(Pcapacity, Pvolume)
+                self.resultCache.set(key, "simulation", simResults)
+            return simResults
+        return self.__runStorage_Load_Sim(Pcapacity, Pvolume)
+
+    def __runStorage_Load_Sim(self, Pcapacity, Pvolume):
+        """
+        Sets up and runs the simulation for runStorage_Load_Sim()
+        """
         if self.primarySystem.loadShift:
             loadShapeN = self.primarySystem.avgLoadShape
         else:
@@ -1230,6 +1328,26 @@ class HPWHsizerRead:
         # Covert hw load to gallons at the given supply temperature using 120 F and cold water of 40 F
         #self.totalHWLoad_G = mixVolume(self.totalHWLoad_G, self.supplyT_F, self.incomingT_F, 120.)
 
+    def getInputHash(self):
+        """
+        Returns a canonical hash of all of the sizing inputs. The inputs are
+        sorted by name and numbers are compared as floats, so the hash does
+        not depend on the order the inputs were set in or on int vs float
+        entries. The hash of the hpwhdata.json contents and the package
+        version are included so results are not reused across data or code
+        changes.
+
+        Returns
+        -------
+        str
+            The sha256 hex digest of the inputs.
+        """
+        inputs = {name : canonicalValue(val) for name, val in self.__dict__.items()}
+        inputs["_hpwhdata"] = hpwhData.dataHash
+        inputs["_version"] = HPWHsizer.__versionfull__
+        text = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(text.encode()).hexdigest()
+
 # Helper Functions for reading and writing files
     def __importArrLine(self, line, setLength):
         """Imports an array in line with a set length, setLength"""
@@ -1293,6 +1411,26 @@ def checkLiqudWater(var_F):
         return False
     return True
 
+def canonicalValue(val):
+    """
+    Converts an input to a canonical JSON serializable value for hashing.
+    Numbers become floats, numpy arrays and tuples become lists.
+
+    Attributes
+    ----------
+        val : float, int, bool, str, list, or numpy.ndarray
+            The value to convert.
+    """
+    if isinstance(val, (bool, np.bool_)):
+        return bool(val)
+    if isinstance(val, (int, float, np.integer, np.floating)):
+        return float(val)
+    if isinstance(val, (list, tuple, np.ndarray)):
+        return [canonicalValue(v) for v in val]
+    if val is None or isinstance(val, str):
+        return val
+    raise Exception("Can not hash input of type " + type(val).__name__)
+
 def loadgpdpp( gpdpp, nBR=None):
     """
     Loads data for the gpdpp inputs if it is of string type, but passes gpdpp
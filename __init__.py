@@ -18,5 +18,6 @@
 """
 
 
-__all__ = ['HPWHsizer', 'HPWHComponents', 'ashraesizer', 'dataFetch', 'cfg', 'Simulator']
+__all__ = ['HPWHsizer', 'HPWHComponents', 'ashraesizer', 'dataFetch', 'cfg', 'Simulator',
+           'resultCache']
 from HPWHsizer.py import *
\ No newline at end of file
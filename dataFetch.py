@@ -21,6 +21,7 @@
 import os
 
 import json
+import hashlib
 from scipy.stats import norm #lognorm
 
 class hpwhDataFetch():
@@ -32,6 +33,9 @@ class hpwhDataFetch():
     ----------
     dataDict : json
         Data dictionary
+    dataHash : str
+        The sha256 hash of the contents of the .json data file. Used to key
+        cached results to the data they were calculated with.
 
     Methods
     -------
@@ -54,8 +58,10 @@ class hpwhDataFetch():
     '''
 
     def __init__(self):
-        with open(os.path.join(os.path.dirname(__file__), 'hpwhdata.json')) as json_file:
-            self.dataDict = json.load(json_file)
+        with open(os.path.join(os.path.dirname(__file__), 'hpwhdata.json'), 'rb') as json_file:
+            contents = json_file.read()
+        self.dataDict = json.loads(contents)
+        self.dataHash = hashlib.sha256(contents).hexdigest()
 
     def getLoadshape(self, shape = 'Stream'):
         try: 
@@ -0,0 +1,170 @@
+"""
+    HPWHulator
+    Copyright (C) 2020  Ecotope Inc.
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os
+import json
+import time
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+
+##############################################################################
+class ResultCache:
+    """
+    A persistent, size bounded cache of sizing results stored in a local
+    SQLite file. Results are stored under a key, typically the input hash from
+    HPWHsizerRead.getInputHash(), and a kind string that names the result,
+    i.e. "build_size", "primaryCurve", or "simulation".
+
+    A connection is opened for each operation so the same file can be shared
+    between processes and survives restarts. When the total size of the
+    stored results grows past maxSize_MB the least recently used results are
+    evicted.
+
+    Attributes
+    ----------
+    fileName : str
+        The path to the SQLite file.
+    maxSize_MB : float
+        The maximum size of the stored results in megabytes.
+
+    Examples
+    --------
+    >>> from resultCache import ResultCache
+    >>> cache = ResultCache("tests/output/cache.sqlite", maxSize_MB = 10)
+    >>> cache.set("abc123", "build_size", [346.1, 114.9])
+    >>> cache.get("abc123", "build_size")
+    [346.1, 114.9]
+    """
+
+    def __init__(self, fileName=None, maxSize_MB=50.):
+        if fileName is None:
+            fileName = os.path.join(os.path.expanduser("~"), ".hpwhulator", "resultcache.sqlite")
+        if maxSize_MB <= 0:
+            raise Exception("The maximum size of the result cache must be greater than 0 MB.")
+
+        dirName = os.path.dirname(os.path.abspath(fileName))
+        if not os.path.isdir(dirName):
+            os.makedirs(dirName)
+
+        self.fileName = fileName
+        self.maxSize_MB = maxSize_MB
+
+        with closing(self.__connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS results ("
+                         "key TEXT NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL, "
+                         "nbytes INTEGER NOT NULL, accessed REAL NOT NULL, "
+                         "PRIMARY KEY (key, kind))")
+
+    def __connect(self):
+        return sqlite3.connect(self.fileName, timeout=30.)
+
+    def get(self, key, kind):
+        """
+        Returns the cached result for the key and kind, or None if there is
+        no result stored.
+
+        Parameters
+        ----------
+        key : str
+            The key the result was stored under.
+        kind : str
+            The name of the result.
+
+        Returns
+        -------
+        The cached result or None.
+        """
+        with closing(self.__connect()) as conn, conn:
+            row = conn.execute("SELECT value FROM results WHERE key = ? AND kind = ?",
+                               (key, kind)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ? AND kind = ?",
+                         (time.time(), key, kind))
+        return json.loads(row[0], object_hook=_decodeNumpy)
+
+    def set(self, key, kind, value):
+        """
+        Stores a result under the key and kind and evicts the least recently
+        used results if the cache is over the maximum size.
+
+        Parameters
+        ----------
+        key : str
+            The key to store the result under.
+        kind : str
+            The name of the result.
+        value : list, dict, float, or numpy.ndarray
+            The result to store, must be JSON serializable except for numpy
+            arrays and numbers.
+        """
+        text = json.dumps(value, cls=_NumpyEncoder, separators=(',', ':'))
+        with closing(self.__connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                         (key, kind, text, len(text), time.time()))
+            self.__evict(conn)
+
+    def __evict(self, conn):
+        """Deletes the least recently used results until under maxSize_MB"""
+        maxBytes = self.maxSize_MB * 1e6
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+        if total <= maxBytes:
+            return
+        rows = conn.execute("SELECT key, kind, nbytes FROM results ORDER BY accessed ASC").fetchall()
+        for key, kind, nbytes in rows:
+            if total <= maxBytes:
+                break
+            conn.execute("DELETE FROM results WHERE key = ? AND kind = ?", (key, kind))
+            total -= nbytes
+
+    def getSize_MB(self):
+        """Returns the size of the stored results in megabytes."""
+        with closing(self.__connect()) as conn:
+            return conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0] / 1e6
+
+    def clear(self):
+        """Deletes all of the stored results."""
+        with closing(self.__connect()) as conn, conn:
+            conn.execute("DELETE FROM results")
+
+    def __len__(self):
+        with closing(self.__connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+##############################################################################
+class _NumpyEncoder(json.JSONEncoder):
+    """JSON encoder that stores numpy arrays and numbers."""
+    def default(self, obj):
+        if isinstance(obj, np.ndarray):
+            return {'__ndarray__': obj.tolist(), 'dtype': str(obj.dtype)}
+        if isinstance(obj, np.bool_):
+            return bool(obj)
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        return json.JSONEncoder.default(self, obj)
+
+def _decodeNumpy(obj):
+    """JSON object hook that restores numpy arrays stored by _NumpyEncoder."""
+    if '__ndarray__' in obj:
+        return np.array(obj['__ndarray__'], dtype=obj['dtype'])
+    return obj
@@ -0,0 +1,331 @@
+"""
+    HPWHulator
+    Copyright (C) 2020  Ecotope Inc.
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import io
+import json
+import asyncio
+import hashlib
+import argparse
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+##############################################################################
+class SizerService:
+    """
+    A local HTTP service for sizing HPWH systems. The service is an asyncio
+    HTTP server that takes JSON requests and returns JSON responses. The CPU
+    work of each request is run in a process pool, identical requests that
+    are in flight at the same time are coalesced into one calculation, and a
+    least recently used cache of responses sits in front of the pool.
+
+    Requests are POSTed to the path of the HPWHsizer method to run, one of
+    /build_size, /getASHRAEResult, /runStorage_Load_Sim, /plotSizingCurve,
+    /plotStorageLoadSim, or /plotParallelTankCurve. The body is a JSON object
+    with the keyword arguments of the HPWHsizer initialization functions:
+
+    .. code-block:: json
+
+        {"initPrimaryByPeople" : {"nPeople" : 100, "nApt" : 36, "gpdpp" : 22,
+                                  "loadShapeNorm" : "stream", "supplyT_F" : 120,
+                                  "incomingT_F" : 50, "storageT_F" : 150,
+                                  "compRuntime_hr" : 16, "percentUseable" : 0.9,
+                                  "aquaFract" : 0.4, "schematic" : "swingtank"},
+         "initTempMaint" : {"Wapt" : 100},
+         "setLoadShiftforPrimary" : {"ls_arr" : [1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,0,0,0,0,1,1,1]},
+         "args" : {}}
+
+    where "initPrimaryByUnits" can be used in place of "initPrimaryByPeople",
+    "initTempMaint" and "setLoadShiftforPrimary" are optional, and "args" are
+    the optional keyword arguments for the method, i.e. Pcapacity and Pvolume
+    for /runStorage_Load_Sim. The response is {"result" : ...} or
+    {"error" : message}. A GET to /status returns the request counts.
+
+    Attributes
+    ----------
+    host : str
+        The host to serve on. Defaults to "127.0.0.1".
+    port : int
+        The port to serve on, 0 picks a free port. Defaults to 8080.
+    maxWorkers : int
+        The number of worker processes. Defaults to the number of cores.
+    cacheSize : int
+        The number of responses kept in the in memory cache. Defaults to 1024.
+    cacheFile : str
+        Optional SQLite file for the persistent HPWHsizer result cache used
+        by the workers. Defaults to None.
+    stats : dict
+        Counts of requests, cache hits, coalesced requests, and calculations.
+
+    Examples
+    --------
+    From the command line:
+
+        $ python sizerService.py --port 8080 --workers 4
+
+    Or from python:
+
+    >>> import asyncio
+    >>> from sizerService import SizerService
+    >>> asyncio.run(SizerService(port = 8080).serve_forever())
+
+    """
+    actions = ["build_size", "getASHRAEResult", "runStorage_Load_Sim",
+               "plotSizingCurve", "plotStorageLoadSim", "plotParallelTankCurve"]
+
+    def __init__(self, host="127.0.0.1", port=8080, maxWorkers=None,
+                 cacheSize=1024, cacheFile=None):
+        self.host = host
+        self.port = port
+        self.maxWorkers = maxWorkers
+        self.cacheSize = cacheSize
+        self.cacheFile = cacheFile
+
+        self.stats = {"requests" : 0, "cacheHits" : 0, "coalesced" : 0,
+                      "computed" : 0, "errors" : 0}
+
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._executor = None
+        self._server = None
+
+    async def start(self):
+        """
+        Starts the worker pool and the server. The port is updated to the
+        bound port.
+        """
+        self._executor = ProcessPoolExecutor(max_workers=self.maxWorkers)
+        self._server = await asyncio.start_server(self._handleConnection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stops the server and shuts down the worker pool."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def serve_forever(self):
+        """Starts the service and serves until cancelled."""
+        await self.start()
+        print("HPWHulator sizing service on http://%s:%i" % (self.host, self.port))
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def runRequest(self, action, payload):
+        """
+        Returns the result of a request from the cache, an identical request in
+        flight, or the worker pool.
+
+        Parameters
+        ----------
+        action : str
+            The HPWHsizer method to run.
+        payload : dict
+            The initialization inputs and method arguments.
+
+        Returns
+        -------
+        The JSON serializable result of the method.
+        """
+        if action not in self.actions:
+            raise KeyError("Unknown action " + action + ", valid actions are: " + ", ".join(self.actions))
+
+        key = requestKey(action, payload)
+        if key in self._cache:
+            self.stats["cacheHits"] += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, runSizerRequest, action, payload, self.cacheFile)
+        self._inflight[key] = future
+        self.stats["computed"] += 1
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self._inflight[key]
+
+        self._cache[key] = result
+        if len(self._cache) > self.cacheSize:
+            self._cache.popitem(last=False)
+        return result
+
+    async def _handleConnection(self, reader, writer):
+        """Handles the HTTP requests on a connection."""
+        try:
+            while True:
+                request = await readRequest(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, response = await self._respond(method, path, body)
+                keepAlive = headers.get("connection", "keep-alive").lower() != "close"
+                writer.write(formatResponse(status, response, keepAlive))
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, path, body):
+        """Returns the HTTP status and JSON response for a request."""
+        action = path.strip("/").split("?")[0]
+        if method == "GET" and action == "status":
+            return 200, dict(self.stats, inflight=len(self._inflight), cached=len(self._cache))
+        if method != "POST":
+            return 405, {"error" : "Only POST requests are supported for sizing"}
+        if action not in self.actions:
+            return 404, {"error" : "Unknown path /" + action}
+
+        self.stats["requests"] += 1
+        try:
+            payload = json.loads(body.decode() or "{}")
+            if not isinstance(payload, dict):
+                raise ValueError("The request body must be a JSON object")
+        except ValueError as e:
+            self.stats["errors"] += 1
+            return 400, {"error" : "Invalid JSON: " + str(e)}
+
+        try:
+            result = await self.runRequest(action, payload)
+        except Exception as e:
+            self.stats["errors"] += 1
+            return 422, {"error" : " ".join(str(arg) for arg in e.args)}
+        return 200, {"result" : result}
+
+##############################################################################
+##############################################################################
+def runSizerRequest(action, payload, cacheFile=None):
+    """
+    Builds a HPWHsizer from a request payload and runs the action. This is
+    the function run in the worker processes.
+
+    Parameters
+    ----------
+    action : str
+        The HPWHsizer method to run.
+    payload : dict
+        The initialization inputs and method arguments.
+    cacheFile : str
+        Optional SQLite file for the HPWHsizer result cache.
+
+    Returns
+    -------
+    The JSON serializable result.
+    """
+    from HPWHsizer import HPWHsizer
+
+    with redirect_stdout(io.StringIO()): # Quiet the license print
+        hpwh = HPWHsizer()
+
+    if "initPrimaryByUnits" in payload:
+        hpwh.initPrimaryByUnits(**payload["initPrimaryByUnits"])
+    elif "initPrimaryByPeople" in payload:
+        hpwh.initPrimaryByPeople(**payload["initPrimaryByPeople"])
+    else:
+        raise Exception("The request needs either initPrimaryByUnits or initPrimaryByPeople inputs")
+    if "initTempMaint" in payload:
+        hpwh.initTempMaint(**payload["initTempMaint"])
+    if "setLoadShiftforPrimary" in payload:
+        hpwh.setLoadShiftforPrimary(**payload["setLoadShiftforPrimary"])
+    if cacheFile is not None:
+        hpwh.setResultCache(cacheFile)
+
+    result = hpwh.build_size()
+    args = payload.get("args", {})
+    if action != "build_size":
+        result = getattr(hpwh, action)(**args)
+    return toJSONable(result)
+
+def requestKey(action, payload):
+    """Returns a hash of the action and the canonical JSON of the payload."""
+    text = json.dumps([action, payload], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def toJSONable(obj):
+    """Converts numpy arrays and numbers in a result to JSON types."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (list, tuple)):
+        return [toJSONable(o) for o in obj]
+    if isinstance(obj, dict):
+        return {k : toJSONable(v) for k, v in obj.items()}
+    return obj
+
+async def readRequest(reader):
+    """
+    Reads one HTTP request from the stream. Returns None at the end of the
+    stream, otherwise the method, path, headers and body.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method.upper(), path, headers, body
+
+def formatResponse(status, response, keepAlive=True):
+    """Returns the bytes of a HTTP response with a JSON body."""
+    reasons = {200 : "OK", 400 : "Bad Request", 404 : "Not Found",
+               405 : "Method Not Allowed", 422 : "Unprocessable Entity"}
+    body = json.dumps(response).encode()
+    head = "HTTP/1.1 %i %s\r\nContent-Type: application/json\r\nContent-Length: %i\r\nConnection: %s\r\n\r\n" \
+        % (status, reasons.get(status, ""), len(body), "keep-alive" if keepAlive else "close")
+    return head.encode("latin-1") + body
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local HPWHulator sizing service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes, defaults to the number of cores.")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Number of responses kept in memory.")
+    parser.add_argument("--cache-file", default=None, help="SQLite file for a persistent result cache.")
+    args = parser.parse_args()
+
+    service = SizerService(args.host, args.port, args.workers, args.cache_size, args.cache_file)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
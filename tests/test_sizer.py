@@ -21,13 +21,18 @@
 import pytest
 
 import filecmp
+import json
+import asyncio
 import numpy as np
 
 import os, sys
 import HPWHsizer
+import HPWHComponents
 import dataFetch
 from HPWHComponents import getPeakIndices
 from cfg import mixVolume
+from resultCache import ResultCache
+from sizerService import SizerService
 
 
 def file_regression(fileRef, fileResults):
@@ -578,3 +583,96 @@ def test_swing_LS(CA_sizer, file1, LS):
         file.write(str(fig))
     assert file_regression("tests/ref/"+os.path.basename(file1),
                             "tests/output/"+os.path.basename(file1))
+
+##############################################################################
+## Result cache tests
+def test_inputHash_canonical(primary_sizer, empty_sizer):
+    # Same inputs given with ints and floats in a different order hash the same
+    empty_sizer.initPrimaryByPeople(100, 36, 22., "stream",
+                                    120., 50., 150, 16, .9, 0.4,
+                                    "primary", .9)
+    assert primary_sizer.inputs.getInputHash() == empty_sizer.inputs.getInputHash()
+
+    empty_sizer.inputs.aquaFract = 0.5
+    assert primary_sizer.inputs.getInputHash() != empty_sizer.inputs.getInputHash()
+
+def test_resultCache_reuse(tmp_path, monkeypatch, primary_sizer, people_sizer):
+    cacheFile = str(tmp_path / "cache.sqlite")
+    primary_sizer.setResultCache(cacheFile)
+    results = primary_sizer.build_size()
+    curve = primary_sizer.plotSizingCurve(return_as_div=False).data[0].x
+    sim = primary_sizer.runStorage_Load_Sim()
+
+    # A new sizer with the same inputs reads back the results without resizing
+    with Shhh():
+        hpwh = HPWHsizer.HPWHsizer()
+    hpwh.initPrimaryByPeople(100, 36, 22, "stream",
+                             120, 50, 150., 16., .9, 0.4,
+                             "primary", .9 )
+    hpwh.setResultCache(cacheFile)
+    def noRecalc(*args):
+        raise Exception("Recalculated a cached result")
+    monkeypatch.setattr(HPWHComponents.PrimarySystem_SP, "sizeVol_Cap", noRecalc)
+    monkeypatch.setattr(HPWHComponents.PrimarySystem_SP, "primaryCurve", noRecalc)
+    assert hpwh.build_size() == results
+    assert hpwh.primarySystem.PVol_G_atStorageT == primary_sizer.primarySystem.PVol_G_atStorageT
+    assert hpwh.runStorage_Load_Sim() == sim
+    fig = hpwh.plotSizingCurve(return_as_div=False)
+    assert all(fig.data[0].x == curve)
+
+    # Different inputs are not read from the cache
+    monkeypatch.undo()
+    people_sizer.setResultCache(cacheFile)
+    assert people_sizer.build_size() != results
+    assert len(people_sizer.resultCache) == 4
+
+def test_resultCache_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), maxSize_MB = 0.01)
+    for ii in range(10):
+        cache.set(str(ii), "simulation", np.arange(500.))
+    assert cache.getSize_MB() <= 0.01
+    assert cache.get("0", "simulation") is None
+    assert all(cache.get("9", "simulation") == np.arange(500.))
+
+##############################################################################
+## Sizing service tests
+def test_sizerService_coalesce_cache():
+    payload = {"initPrimaryByPeople" : {"nPeople" : 100, "nApt" : 36, "gpdpp" : 22,
+                                        "loadShapeNorm" : "stream", "supplyT_F" : 120,
+                                        "incomingT_F" : 50, "storageT_F" : 150,
+                                        "compRuntime_hr" : 16, "percentUseable" : .9,
+                                        "aquaFract" : 0.4, "schematic" : "primary",
+                                        "defrostFactor" : .9}}
+    async def post(port, path, body):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps(body).encode()
+        writer.write(b"POST " + path.encode() + b" HTTP/1.1\r\nConnection: close\r\n" +
+                     b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        response = await reader.read()
+        writer.close()
+        status = int(response.split(b" ")[1])
+        return status, json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+    async def run():
+        service = SizerService(port=0, maxWorkers=2)
+        await service.start()
+        try:
+            responses = await asyncio.gather(*[post(service.port, "/build_size", payload) for ii in range(4)])
+            cached = await post(service.port, "/build_size", payload)
+            bad = await post(service.port, "/build_size", {"initPrimaryByPeople" : {}})
+            missing = await post(service.port, "/nothing", payload)
+        finally:
+            await service.close()
+        return responses, cached, bad, missing, service.stats
+
+    responses, cached, bad, missing, stats = asyncio.run(run())
+
+    with Shhh():
+        hpwh = HPWHsizer.HPWHsizer()
+    hpwh.initPrimaryByPeople(**payload["initPrimaryByPeople"])
+    expected = hpwh.build_size()
+    assert all(r == (200, {"result" : expected}) for r in responses + [cached])
+    assert stats["computed"] == 2 # The one valid request and the bad one
+    assert stats["coalesced"] + stats["cacheHits"] == 4
+    assert bad[0] == 422 and "error" in bad[1]
+    assert missing[0] == 404